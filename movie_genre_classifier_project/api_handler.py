@@ -1,72 +1,332 @@
+import asyncio
 import requests
 import time
 import json
 import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Optional
-from config import OMDB_API_KEY, OMDB_BASE_URL
+from config import OMDB_API_KEY, OMDB_BASE_URL, OMDB_RATE_LIMIT, OMDB_RATE_BURST, MAX_WORKERS, MEMORY_CACHE_SIZE, CACHE_DURATION, CACHE_WRITE_BATCH
+
+try:
+    import aiohttp
+except ImportError:  # optional, only needed for async batch fetching
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the slower stdlib json
+    orjson = None
+
+ASYNC_AVAILABLE = aiohttp is not None
+
+# First four-digit year in OMDb values such as "2019" or "2019–2022"
+_YEAR_RE = re.compile(r'(\d{4})')
+
+def _cache_key(movie_title: str) -> str:
+    """Cache key for a title; the lower-cased title itself, no hashing needed"""
+    return movie_title.lower()
+
+def _json_loads(data):
+    """Parse JSON from str or bytes"""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _json_dumps(data) -> bytes:
+    """Serialize data to UTF-8 encoded JSON"""
+    return orjson.dumps(data) if orjson else json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+class TokenBucket:
+    """Thread-safe rate limiter allowing bursts of `capacity` calls, refilled at `rate` per second"""
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before it may be used"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A negative balance queues callers behind tokens that have not refilled yet
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+    
+    def acquire(self):
+        """Block until the caller may issue the next request"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+class LRUCache:
+    """Thread-safe in-memory cache that evicts the least recently used or expired entries"""
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str):
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            if key not in self._data:
+                return None
+            expires_at, value = self._data[key]
+            if time.time() > expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def put(self, key: str, value, stored_at: Optional[float] = None):
+        """Store value under key, evicting the oldest entry when full"""
+        if stored_at is None:
+            stored_at = time.time()
+        with self._lock:
+            self._data[key] = (stored_at + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
 
 class MovieAPIHandler:
     def __init__(self):
         self.omdb_api_key = OMDB_API_KEY
         self.cache_dir = "cache"
-        self._ensure_cache_dir()
+        self.db = self._open_cache_db()
+        self._db_lock = threading.Lock()
+        self._pending_writes = []
+        self._mem_cache = LRUCache(MEMORY_CACHE_SIZE, CACHE_DURATION)
+        # Shared by all worker threads so a batch respects OMDb limits
+        self._rate_limiter = TokenBucket(OMDB_RATE_LIMIT, OMDB_RATE_BURST)
+        self.session = self._create_session()
         
-    def _ensure_cache_dir(self):
-        """Create cache directory if it doesn't exist"""
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
+    def _create_session(self) -> requests.Session:
+        """Create a pooled HTTP session that keeps connections alive between requests"""
+        session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retries)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
     
-    def _get_cache_path(self, movie_title: str) -> str:
-        """Generate cache file path for a movie"""
-        import hashlib
-        filename = hashlib.md5(movie_title.lower().encode()).hexdigest() + ".json"
-        return os.path.join(self.cache_dir, filename)
+    def _open_cache_db(self) -> sqlite3.Connection:
+        """Open the SQLite cache database, creating it if needed"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Shared across worker threads; access is serialized by self._db_lock
+        db = sqlite3.connect(os.path.join(self.cache_dir, "movies.db"), check_same_thread=False)
+        # Write-ahead logging keeps commits atomic while syncing to disk far less often
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        with db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, json BLOB, ts INTEGER, etag TEXT, last_modified TEXT)'
+            )
+            # Upgrade databases created before HTTP validators were stored
+            columns = {row[1] for row in db.execute('PRAGMA table_info(cache)')}
+            for column in ('etag', 'last_modified'):
+                if column not in columns:
+                    db.execute(f'ALTER TABLE cache ADD COLUMN {column} TEXT')
+            # Drop expired entries that cannot be revalidated so the cache does not grow without bound
+            db.execute(
+                'DELETE FROM cache WHERE ts <= ? AND etag IS NULL AND last_modified IS NULL',
+                (time.time() - CACHE_DURATION,)
+            )
+        return db
     
     def _load_from_cache(self, movie_title: str) -> Optional[Dict]:
-        """Load movie data from cache"""
-        cache_path = self._get_cache_path(movie_title)
-        if os.path.exists(cache_path):
+        """Load movie data from cache, ignoring entries older than CACHE_DURATION"""
+        try:
+            with self._db_lock:
+                row = self.db.execute(
+                    'SELECT json, ts FROM cache WHERE key = ? AND ts > ?',
+                    (_cache_key(movie_title), time.time() - CACHE_DURATION)
+                ).fetchone()
+            if not row:
+                return None
+            cached_data = _json_loads(row[0])
+            cached_data['ts'] = row[1]
+            return cached_data
+        except (sqlite3.Error, ValueError):
+            return None
+    
+    def _load_stale_from_cache(self, movie_title: str) -> Optional[Dict]:
+        """Load a cache entry of any age that carries HTTP validators for revalidation"""
+        try:
+            with self._db_lock:
+                row = self.db.execute(
+                    'SELECT json, etag, last_modified FROM cache '
+                    'WHERE key = ? AND (etag IS NOT NULL OR last_modified IS NOT NULL)',
+                    (_cache_key(movie_title),)
+                ).fetchone()
+            if not row:
+                return None
+            cached_data = _json_loads(row[0])
+            cached_data['etag'], cached_data['last_modified'] = row[1], row[2]
+            return cached_data if 'omdb' in cached_data else None
+        except (sqlite3.Error, ValueError):
+            return None
+    
+    def _save_to_cache(self, movie_title: str, data: Dict, etag: Optional[str] = None,
+                       last_modified: Optional[str] = None):
+        """Queue movie data for the next batched cache write"""
+        entry = (_cache_key(movie_title), _json_dumps(data), int(time.time()), etag, last_modified)
+        with self._db_lock:
+            self._pending_writes.append(entry)
+            should_flush = len(self._pending_writes) >= CACHE_WRITE_BATCH
+        if should_flush:
+            self.flush_cache()
+    
+    def flush_cache(self):
+        """Write all queued cache entries in a single transaction"""
+        with self._db_lock:
+            pending, self._pending_writes = self._pending_writes, []
+            if not pending:
+                return
             try:
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
+                with self.db:
+                    self.db.executemany(
+                        'INSERT OR REPLACE INTO cache (key, json, ts, etag, last_modified) VALUES (?, ?, ?, ?, ?)',
+                        pending
+                    )
+            except sqlite3.Error:
                 pass
+    
+    def bulk_load(self, movie_titles: List[str]) -> Dict[str, Dict]:
+        """Load cached OMDb data for many titles, querying the database in chunks"""
+        hits = {}
+        missing = {}
+        for title in movie_titles:
+            key = _cache_key(title)
+            data = self._mem_cache.get(key)
+            if data:
+                hits[title] = data
+            else:
+                missing.setdefault(key, []).append(title)
+        
+        keys = list(missing)
+        cutoff = time.time() - CACHE_DURATION
+        # Stay well below SQLite's limit on bound parameters per statement
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            try:
+                with self._db_lock:
+                    rows = self.db.execute(
+                        f'SELECT key, json, ts FROM cache WHERE key IN ({placeholders}) AND ts > ?',
+                        (*chunk, cutoff)
+                    ).fetchall()
+            except sqlite3.Error:
+                continue
+            
+            for key, blob, ts in rows:
+                try:
+                    cached_data = _json_loads(blob)
+                except ValueError:
+                    continue
+                if 'omdb' not in cached_data:
+                    continue
+                self._mem_cache.put(key, cached_data['omdb'], stored_at=ts)
+                for title in missing[key]:
+                    hits[title] = cached_data['omdb']
+        
+        return hits
+    
+    def _get_cached_omdb(self, movie_title: str) -> Optional[Dict]:
+        """Return cached OMDb data for a movie, checking memory before disk"""
+        key = _cache_key(movie_title)
+        data = self._mem_cache.get(key)
+        if data:
+            return data
+        
+        cached_data = self._load_from_cache(movie_title)
+        if cached_data and 'omdb' in cached_data:
+            self._mem_cache.put(key, cached_data['omdb'], stored_at=cached_data['ts'])
+            return cached_data['omdb']
         return None
     
-    def _save_to_cache(self, movie_title: str, data: Dict):
-        """Save movie data to cache"""
-        cache_path = self._get_cache_path(movie_title)
+    def _cache_omdb(self, movie_title: str, data: Dict, headers=None):
+        """Store OMDb data and its HTTP validators in both the memory and disk caches"""
+        headers = headers or {}
+        self._mem_cache.put(_cache_key(movie_title), data)
+        self._save_to_cache(movie_title, {'omdb': data}, headers.get('ETag'), headers.get('Last-Modified'))
+    
+    def _revalidation_headers(self, stale_data: Optional[Dict]) -> Dict:
+        """Build conditional request headers from a stale cache entry"""
+        headers = {}
+        if stale_data:
+            if stale_data.get('etag'):
+                headers['If-None-Match'] = stale_data['etag']
+            if stale_data.get('last_modified'):
+                headers['If-Modified-Since'] = stale_data['last_modified']
+        return headers
+    
+    def _refresh_stale(self, movie_title: str, stale_data: Dict, headers):
+        """Mark a revalidated entry fresh, keeping validators the server did not resend"""
+        self._cache_omdb(movie_title, stale_data['omdb'], {
+            'ETag': headers.get('ETag') or stale_data['etag'],
+            'Last-Modified': headers.get('Last-Modified') or stale_data['last_modified']
+        })
+    
+    def clear_cache(self):
+        """Drop all cached movie data from memory and disk"""
+        self._mem_cache.clear()
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except:
+            with self._db_lock, self.db:
+                self._pending_writes = []
+                self.db.execute('DELETE FROM cache')
+        except sqlite3.Error:
             pass
     
+    def _omdb_params(self, movie_title: str) -> Dict:
+        """Build OMDb query parameters for a title search"""
+        return {
+            'apikey': self.omdb_api_key,
+            't': movie_title,
+            'type': 'movie',
+            'plot': 'short'
+        }
+    
     def search_movie_omdb(self, movie_title: str) -> Optional[Dict]:
         """Search for movie using OMDb API"""
         if not self.omdb_api_key or self.omdb_api_key == "4bcd5aba":
             return None
             
         # Check cache first
-        cached_data = self._load_from_cache(movie_title)
-        if cached_data and 'omdb' in cached_data:
-            return cached_data['omdb']
+        cached_data = self._get_cached_omdb(movie_title)
+        if cached_data:
+            return cached_data
+        stale_data = self._load_stale_from_cache(movie_title)
         
         try:
-            params = {
-                'apikey': self.omdb_api_key,
-                't': movie_title,
-                'type': 'movie',
-                'plot': 'short'
-            }
-            
-            response = requests.get(OMDB_BASE_URL, params=params, timeout=10)
+            self._rate_limiter.acquire()
+            response = self.session.get(
+                OMDB_BASE_URL,
+                params=self._omdb_params(movie_title),
+                headers=self._revalidation_headers(stale_data),
+                timeout=10
+            )
+            # Unchanged upstream: refresh the stale entry instead of re-downloading it
+            if stale_data and response.status_code == 304:
+                self._refresh_stale(movie_title, stale_data, response.headers)
+                return stale_data['omdb']
             response.raise_for_status()
             
-            data = response.json()
+            data = _json_loads(response.content)
             if data.get('Response') == 'True':
                 # Cache the result
-                self._save_to_cache(movie_title, {'omdb': data})
+                self._cache_omdb(movie_title, data, response.headers)
                 return data
                 
         except requests.exceptions.RequestException as e:
@@ -76,17 +336,75 @@ class MovieAPIHandler:
             
         return None
     
+    async def _fetch_omdb(self, session, movie_title: str) -> Optional[Dict]:
+        """Search for movie using OMDb API without blocking the event loop"""
+        if not self.omdb_api_key or self.omdb_api_key == "4bcd5aba":
+            return None
+        
+        # Check cache first
+        cached_data = self._get_cached_omdb(movie_title)
+        if cached_data:
+            return cached_data
+        stale_data = self._load_stale_from_cache(movie_title)
+        
+        try:
+            await asyncio.sleep(self._rate_limiter.reserve())
+            async with session.get(OMDB_BASE_URL, params=self._omdb_params(movie_title),
+                                   headers=self._revalidation_headers(stale_data),
+                                   timeout=aiohttp.ClientTimeout(total=10)) as response:
+                # Unchanged upstream: refresh the stale entry instead of re-downloading it
+                if stale_data and response.status == 304:
+                    self._refresh_stale(movie_title, stale_data, response.headers)
+                    return stale_data['omdb']
+                response.raise_for_status()
+                data = _json_loads(await response.read())
+                headers = response.headers
+            
+            if data.get('Response') == 'True':
+                # Cache the result
+                self._cache_omdb(movie_title, data, headers)
+                return data
+                
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"OMDb API error for '{movie_title}': {e}")
+        except Exception as e:
+            print(f"Unexpected error with OMDb for '{movie_title}': {e}")
+            
+        return None
+    
+    async def get_movies_data_async(self, movie_titles: List[str], progress_callback=None) -> List[Dict]:
+        """Get movie data for many titles concurrently, preserving input order"""
+        semaphore = asyncio.Semaphore(MAX_WORKERS)
+        total_movies = len(movie_titles)
+        completed = 0
+        
+        async def fetch(session, title):
+            nonlocal completed
+            async with semaphore:
+                omdb_data = await self._fetch_omdb(session, title)
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total_movies)
+            return self.build_movie_data(title, omdb_data)
+        
+        connector = aiohttp.TCPConnector(limit=32)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await asyncio.gather(*(fetch(session, title) for title in movie_titles))
+    
     def get_movie_data(self, movie_title: str) -> Dict:
         """Get movie data from OMDb API"""
+        return self.build_movie_data(movie_title, self.search_movie_omdb(movie_title))
+    
+    def build_movie_data(self, movie_title: str, omdb_data: Optional[Dict]) -> Dict:
+        """Convert an OMDb response into the classifier's movie record"""
         movie_data = {}
         
-        # Try OMDb
-        omdb_data = self.search_movie_omdb(movie_title)
         if omdb_data:
             movie_data['omdb'] = omdb_data
             movie_data['title'] = omdb_data.get('Title', movie_title)
             movie_data['genres'] = omdb_data.get('Genre', '').split(', ') if omdb_data.get('Genre') else []
-            movie_data['year'] = omdb_data.get('Year', 'Unknown').replace('–', '').split('–')[0]
+            year_match = _YEAR_RE.search(omdb_data.get('Year', ''))
+            movie_data['year'] = year_match.group(1) if year_match else 'Unknown'
             movie_data['overview'] = omdb_data.get('Plot', '')
             movie_data['rating'] = omdb_data.get('imdbRating')
             movie_data['source'] = 'OMDb'
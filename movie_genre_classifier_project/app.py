@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
 import time
-import os
-from movie_classifier import MovieGenreClassifier
-from utils import load_movies_from_file, export_to_csv, export_to_json, validate_movie_titles
-from config import DEFAULT_GENRES
+import uuid
+from io import BytesIO
+from movie_classifier import MovieGenreClassifier, ARROW_AVAILABLE
+from api_handler import MovieAPIHandler
+from utils import load_movies_from_file, validate_movie_titles
+from config import ALL_GENRES
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -40,10 +42,45 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_api_handler() -> MovieAPIHandler:
+    """Share one API handler (connection pool, caches, rate limit) across reruns and sessions"""
+    return MovieAPIHandler()
+
+@st.cache_data(max_entries=32)
+def build_export_payloads(batch_id: str, _classifier: MovieGenreClassifier) -> tuple:
+    """Serialize a classification batch to CSV, JSON and Excel once per batch"""
+    if ARROW_AVAILABLE:
+        import pyarrow.csv as pa_csv
+        table = _classifier.export_to_arrow()
+        csv_buffer = BytesIO()
+        pa_csv.write_csv(table, csv_buffer)
+        csv_data = csv_buffer.getvalue()
+        df = table.to_pandas()
+    else:
+        df = _classifier.export_to_dataframe()
+        csv_data = df.to_csv(index=False)
+    json_data = df.to_json(orient='records', indent=2)
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False)
+    return csv_data, json_data, buffer.getvalue()
+
+@st.cache_data(max_entries=32)
+def make_genre_fig(genre_counts: tuple):
+    """Build the genre distribution chart once per distinct set of counts"""
+    counts = pd.Series(dict(genre_counts))
+    return px.bar(
+        x=counts.index,
+        y=counts.values,
+        title="Genre Distribution",
+        labels={'x': 'Genre', 'y': 'Number of Movies'}
+    )
+
 class MovieClassifierApp:
     def __init__(self):
-        self.classifier = MovieGenreClassifier()
         self.initialize_session_state()
+        self.classifier = st.session_state.classifier
     
     def initialize_session_state(self):
         """Initialize session state variables"""
@@ -53,6 +90,10 @@ class MovieClassifierApp:
             st.session_state.processed_movies = None
         if 'processing_complete' not in st.session_state:
             st.session_state.processing_complete = False
+        if 'batch_id' not in st.session_state:
+            st.session_state.batch_id = None
+        if 'classifier' not in st.session_state:
+            st.session_state.classifier = MovieGenreClassifier(get_api_handler())
     
     def render_sidebar(self):
         """Render the sidebar with input options"""
@@ -84,19 +125,13 @@ class MovieClassifierApp:
             )
             
             if uploaded_file is not None:
-                # Save uploaded file temporarily
-                with open("temp_uploaded_file", "wb") as f:
-                    f.write(uploaded_file.getvalue())
-                
                 try:
-                    movie_titles = load_movies_from_file("temp_uploaded_file")
+                    # Parse the upload in memory; the extension picks the format
+                    ext = uploaded_file.name.rsplit('.', 1)[-1]
+                    movie_titles = load_movies_from_file(uploaded_file.getvalue(), ext=ext)
                     st.sidebar.success(f"Loaded {len(movie_titles)} movies from {uploaded_file.name}")
                 except Exception as e:
                     st.sidebar.error(f"Error reading file: {str(e)}")
-                finally:
-                    # Clean up temporary file
-                    if os.path.exists("temp_uploaded_file"):
-                        os.remove("temp_uploaded_file")
         
         # API Configuration
         st.sidebar.subheader("🔧 Configuration")
@@ -227,6 +262,8 @@ class MovieClassifierApp:
         st.session_state.classified_movies = classified_movies
         st.session_state.processed_movies = self.classifier.processed_movies
         st.session_state.processing_complete = True
+        # Identifies this batch for cached export payloads
+        st.session_state.batch_id = uuid.uuid4().hex
         
         progress_bar.progress(1.0)
         status_text.text("Classification complete!")
@@ -255,12 +292,8 @@ class MovieClassifierApp:
         
         # Genre distribution chart
         if stats['genre_counts']:
-            fig = px.bar(
-                x=list(stats['genre_counts'].keys()),
-                y=list(stats['genre_counts'].values()),
-                title="Genre Distribution",
-                labels={'x': 'Genre', 'y': 'Number of Movies'}
-            )
+            # A tuple of (genre, count) pairs is hashable, so reruns reuse the figure
+            fig = make_genre_fig(tuple(stats['genre_counts'].items()))
             st.plotly_chart(fig, use_container_width=True)
         
         # Export options
@@ -275,11 +308,13 @@ class MovieClassifierApp:
         
         col1, col2, col3 = st.columns(3)
         
-        # Convert to DataFrame for export
-        df = self.classifier.export_to_dataframe()
+        # Serialized once per batch, reused on later reruns
+        csv_data, json_data, excel_data = build_export_payloads(
+            st.session_state.batch_id, 
+            self.classifier
+        )
         
         with col1:
-            csv_data = df.to_csv(index=False)
             st.download_button(
                 "Download CSV",
                 csv_data,
@@ -289,7 +324,6 @@ class MovieClassifierApp:
             )
         
         with col2:
-            json_data = df.to_json(orient='records', indent=2)
             st.download_button(
                 "Download JSON",
                 json_data,
@@ -299,39 +333,33 @@ class MovieClassifierApp:
             )
         
         with col3:
-            excel_data = df.to_excel("temp_movies.xlsx", index=False)
-            with open("temp_movies.xlsx", "rb") as f:
-                st.download_button(
-                    "Download Excel",
-                    f.read(),
-                    "classified_movies.xlsx",
-                    "application/vnd.ms-excel",
-                    use_container_width=True
-                )
-            # Clean up temporary file
-            if os.path.exists("temp_movies.xlsx"):
-                os.remove("temp_movies.xlsx")
+            st.download_button(
+                "Download Excel",
+                excel_data,
+                "classified_movies.xlsx",
+                "application/vnd.ms-excel",
+                use_container_width=True
+            )
     
     def render_genre_tabs(self):
         """Render tabs for each genre"""
         st.subheader("🎭 Movies by Genre")
         
+        classified_movies = st.session_state.classified_movies or {}
+        
         # Create tabs for each genre that has movies
-        genres_with_movies = [
-            genre for genre in DEFAULT_GENRES + ['Unknown'] 
-            if (st.session_state.classified_movies and 
-                len(st.session_state.classified_movies.get(genre, [])) > 0)
-        ]
+        genre_sizes = {genre: len(classified_movies.get(genre, [])) for genre in ALL_GENRES}
+        genres_with_movies = [genre for genre in ALL_GENRES if genre_sizes[genre] > 0]
         
         if not genres_with_movies:
             st.info("No movies found in any genre categories.")
             return
         
-        tabs = st.tabs([f"{genre} ({len(st.session_state.classified_movies[genre])})" for genre in genres_with_movies])
+        tabs = st.tabs([f"{genre} ({genre_sizes[genre]})" for genre in genres_with_movies])
         
         for i, genre in enumerate(genres_with_movies):
             with tabs[i]:
-                movies = st.session_state.classified_movies[genre]
+                movies = classified_movies[genre]
                 
                 for movie in movies:
                     with st.container():
@@ -9,7 +9,7 @@ OMDB_API_KEY = os.getenv('OMDB_API_KEY', '4bcd5aba')
 
 # API Endpoints
 # TMDB_BASE_URL = "https://api.themoviedb.org/3"
-OMDB_BASE_URL = "http://www.omdbapi.com/?i=tt3896198&apikey=4bcd5aba"
+OMDB_BASE_URL = "https://www.omdbapi.com/"
 
 # Default Settings
 DEFAULT_GENRES = [
@@ -18,5 +18,15 @@ DEFAULT_GENRES = [
     "Horror", "Music", "Mystery", "Romance", "Science Fiction",
     "TV Movie", "Thriller", "War", "Western"
 ]
+KNOWN_GENRES = frozenset(DEFAULT_GENRES)
+ALL_GENRES = tuple(DEFAULT_GENRES) + ('Unknown',)
 
-CACHE_DURATION = 24 * 60 * 60  # 24 hours in seconds
\ No newline at end of file
+CACHE_DURATION = 24 * 60 * 60  # 24 hours in seconds
+MEMORY_CACHE_SIZE = 4096  # movies kept in the in-process LRU cache
+CACHE_WRITE_BATCH = 50  # cache writes grouped into one transaction
+
+# Batch Fetching
+MAX_WORKERS = 16  # concurrent OMDb lookups per batch
+OMDB_RATE_LIMIT = 10  # sustained OMDb requests per second
+OMDB_RATE_BURST = 20  # requests allowed at once before throttling kicks in
+USE_ASYNC_FETCH = os.getenv('USE_ASYNC_FETCH', 'false').lower() == 'true'  # requires aiohttp
@@ -1,82 +1,174 @@
+import asyncio
 import pandas as pd
-from typing import List, Dict, Any
-from api_handler import MovieAPIHandler
-from config import DEFAULT_GENRES
-import time
+from collections import Counter
+from typing import List, Dict, Any, Optional
+from api_handler import MovieAPIHandler, ASYNC_AVAILABLE
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import ALL_GENRES, KNOWN_GENRES, MAX_WORKERS, USE_ASYNC_FETCH
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional, enables columnar exports
+    pa = None
+
+ARROW_AVAILABLE = pa is not None
+
+def _event_loop_running() -> bool:
+    """Check whether an asyncio event loop is already running in this thread"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+# Movie record fields exported, mapped to their column headers
+EXPORT_COLUMNS = {
+    'title': 'Title',
+    'year': 'Year',
+    'genres': 'Genres',
+    'rating': 'Rating',
+    'overview': 'Overview',
+    'source': 'Source'
+}
+
+# Values used for missing fields in exports
+EXPORT_DEFAULTS = {
+    'Title': '',
+    'Year': 'Unknown',
+    'Genres': '',
+    'Rating': 'N/A',
+    'Overview': '',
+    'Source': 'Unknown'
+}
 
 class MovieGenreClassifier:
-    def __init__(self):
-        self.api_handler = MovieAPIHandler()
+    def __init__(self, api_handler: Optional[MovieAPIHandler] = None):
+        self.api_handler = api_handler or MovieAPIHandler()
         self.processed_movies = []
+        self.table = None
+        self._reset_statistics()
+    
+    def _reset_statistics(self):
+        """Clear the running counters behind get_statistics"""
+        self._found_movies = 0
+        self._unknown_genres = 0
+        self._genre_counts = Counter()
     
     def classify_movies(self, movie_titles: List[str], progress_callback=None) -> Dict[str, Any]:
         """Classify a list of movies by genre"""
-        classified_movies = {genre: [] for genre in DEFAULT_GENRES}
-        classified_movies['Unknown'] = []
+        classified_movies = {genre: [] for genre in ALL_GENRES}
         self.processed_movies = []
+        self.table = None
+        self._reset_statistics()
         
-        total_movies = len(movie_titles)
+        results = self._fetch_movies(movie_titles, progress_callback)
         
-        for i, title in enumerate(movie_titles):
-            if progress_callback:
-                progress_callback(i + 1, total_movies)
-            
-            movie_data = self.api_handler.get_movie_data(title.strip())
+        # Classify in input order, updating statistics in the same pass
+        for movie_data in results:
             self.processed_movies.append(movie_data)
             
-            # Add to genre categories
             genres = movie_data.get('genres', [])
+            if movie_data.get('source') != 'Not Found':
+                self._found_movies += 1
+            if not genres or genres == ['Unknown']:
+                self._unknown_genres += 1
+            self._genre_counts.update(genres)
+            
+            # Add to genre categories
             if not genres:
                 classified_movies['Unknown'].append(movie_data)
             else:
                 for genre in genres:
-                    if genre in classified_movies:
+                    if genre in KNOWN_GENRES:
                         classified_movies[genre].append(movie_data)
                     else:
                         classified_movies['Unknown'].append(movie_data)
-            
-            # Small delay to be respectful to APIs
-            time.sleep(0.1)
         
         return classified_movies
     
+    def _fetch_movies(self, movie_titles: List[str], progress_callback=None) -> List[Dict]:
+        """Fetch movie data for all titles, preserving input order"""
+        titles = [title.strip() for title in movie_titles]
+        total_movies = len(titles)
+        
+        # Serve cached titles from one bulk lookup; only misses go to the network
+        hits = self.api_handler.bulk_load(titles)
+        results = [
+            self.api_handler.build_movie_data(title, hits[title]) if title in hits else None
+            for title in titles
+        ]
+        misses = [i for i, movie_data in enumerate(results) if movie_data is None]
+        cached_count = total_movies - len(misses)
+        
+        def report_progress(completed, _total):
+            if progress_callback:
+                progress_callback(cached_count + completed, total_movies)
+        
+        if cached_count:
+            report_progress(0, total_movies)
+        
+        try:
+            fetched = self._fetch_uncached([titles[i] for i in misses], report_progress)
+        finally:
+            self.api_handler.flush_cache()
+        
+        for i, movie_data in zip(misses, fetched):
+            results[i] = movie_data
+        return results
+    
+    def _fetch_uncached(self, titles: List[str], progress_callback) -> List[Dict]:
+        """Look up titles concurrently, preserving input order"""
+        # asyncio.run cannot be nested, so fall back to threads inside a running loop
+        if USE_ASYNC_FETCH and ASYNC_AVAILABLE and not _event_loop_running():
+            return asyncio.run(self.api_handler.get_movies_data_async(titles, progress_callback))
+        
+        total_movies = len(titles)
+        results = [None] * total_movies
+        
+        # The API handler enforces the OMDb rate limit across workers
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(self.api_handler.get_movie_data, title): i
+                for i, title in enumerate(titles)
+            }
+            for completed, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                progress_callback(completed, total_movies)
+        
+        return results
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get statistics about processed movies"""
         if not self.processed_movies:
             return {}
         
         total_movies = len(self.processed_movies)
-        found_movies = len([m for m in self.processed_movies if m.get('source') != 'Not Found'])
-        unknown_genres = len([m for m in self.processed_movies if not m.get('genres') or m.get('genres') == ['Unknown']])
-        
-        genre_counts = {}
-        for movie in self.processed_movies:
-            for genre in movie.get('genres', []):
-                if genre in genre_counts:
-                    genre_counts[genre] += 1
-                else:
-                    genre_counts[genre] = 1
+        found_movies = self._found_movies
         
         return {
             'total_movies': total_movies,
             'found_movies': found_movies,
             'not_found_movies': total_movies - found_movies,
-            'unknown_genres': unknown_genres,
-            'genre_counts': genre_counts,
+            'unknown_genres': self._unknown_genres,
+            'genre_counts': dict(self._genre_counts),
             'success_rate': (found_movies / total_movies) * 100 if total_movies > 0 else 0
         }
     
     def export_to_dataframe(self) -> pd.DataFrame:
         """Export processed movies to pandas DataFrame"""
-        data = []
-        for movie in self.processed_movies:
-            data.append({
-                'Title': movie.get('title', ''),
-                'Year': movie.get('year', 'Unknown'),
-                'Genres': ', '.join(movie.get('genres', [])),
-                'Rating': movie.get('rating', 'N/A'),
-                'Overview': movie.get('overview', ''),
-                'Source': movie.get('source', 'Unknown')
-            })
-        
-        return pd.DataFrame(data)
\ No newline at end of file
+        df = pd.DataFrame.from_records(self.processed_movies, columns=list(EXPORT_COLUMNS))
+        df['genres'] = df['genres'].map(', '.join, na_action='ignore')
+        df = df.rename(columns=EXPORT_COLUMNS)
+        return df.fillna(EXPORT_DEFAULTS)
+    
+    def export_to_arrow(self) -> 'pa.Table':
+        """Export processed movies to a columnar Arrow table, built once per batch"""
+        if self.table is None:
+            columns = {}
+            for field, header in EXPORT_COLUMNS.items():
+                values = [movie.get(field) for movie in self.processed_movies]
+                if field == 'genres':
+                    values = [', '.join(genres) if genres is not None else None for genres in values]
+                columns[header] = pa.array(values, type=pa.string()).fill_null(EXPORT_DEFAULTS[header])
+            self.table = pa.table(columns)
+        return self.table
\ No newline at end of file
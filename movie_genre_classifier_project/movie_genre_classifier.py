@@ -4,12 +4,12 @@ import pandas as pd
 import requests
 import json
 import csv
+import re
 import time
-import os
 import plotly.express as px
 import plotly.graph_objects as go
 from typing import List, Dict, Any, Optional
-from io import StringIO
+from io import StringIO, BytesIO
 
 # Page configuration
 st.set_page_config(
@@ -54,6 +54,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# First four-digit year in OMDb values such as "2019" or "2019–2022"
+_YEAR_RE = re.compile(r'(\d{4})')
+
 class MovieGenreClassifier:
     def __init__(self):
         # Your OMDb API key directly implemented
@@ -77,7 +80,7 @@ class MovieGenreClassifier:
                 'plot': 'short'
             }
             
-            response = requests.get("http://www.omdbapi.com/", params=params, timeout=10)
+            response = requests.get("https://www.omdbapi.com/", params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -103,7 +106,8 @@ class MovieGenreClassifier:
             movie_data['omdb'] = omdb_data
             movie_data['title'] = omdb_data.get('Title', movie_title)
             movie_data['genres'] = omdb_data.get('Genre', '').split(', ') if omdb_data.get('Genre') else []
-            movie_data['year'] = omdb_data.get('Year', 'Unknown').replace('–', '').split('–')[0]
+            year_match = _YEAR_RE.search(omdb_data.get('Year', ''))
+            movie_data['year'] = year_match.group(1) if year_match else 'Unknown'
             movie_data['overview'] = omdb_data.get('Plot', '')
             movie_data['rating'] = omdb_data.get('imdbRating')
             movie_data['votes'] = omdb_data.get('imdbVotes', '0').replace(',', '')
@@ -534,22 +538,18 @@ def render_export_section(processed_movies):
         )
     
     with col3:
-        # For Excel, we need to create a temporary file
-        excel_file = "temp_movies.xlsx"
-        df.to_excel(excel_file, index=False)
-        with open(excel_file, "rb") as f:
-            excel_data = f.read()
+        # Build the workbook in memory instead of a temporary file
+        buffer = BytesIO()
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False)
         st.download_button(
             "💾 Download Excel",
-            excel_data,
+            buffer.getvalue(),
             "classified_movies.xlsx",
             "application/vnd.ms-excel",
             use_container_width=True,
             help="Export as Excel file for business use"
         )
-        # Clean up temporary file
-        if os.path.exists(excel_file):
-            os.remove(excel_file)
 
 def render_rating_analysis(stats):
     """Render detailed rating analysis"""
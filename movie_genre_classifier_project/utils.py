@@ -0,0 +1,58 @@
+import json
+import os
+import pandas as pd
+from io import BytesIO
+from typing import List, Optional, Union, BinaryIO
+
+def load_movies_from_file(source: Union[str, bytes, BinaryIO], ext: Optional[str] = None) -> List[str]:
+    """Load movie titles from a TXT, CSV or JSON file path or in-memory content"""
+    if isinstance(source, str):
+        ext = ext or os.path.splitext(source)[1]
+        with open(source, 'rb') as f:
+            content = f.read()
+    elif isinstance(source, bytes):
+        content = source
+    else:
+        content = source.read()
+
+    ext = (ext or '').lstrip('.').lower()
+    movie_titles = []
+
+    if ext == 'csv':
+        # Assume first column contains movie titles
+        df = pd.read_csv(BytesIO(content))
+        movie_titles = df.iloc[:, 0].dropna().astype(str).tolist()
+
+    elif ext == 'txt':
+        text = content.decode('utf-8')
+        movie_titles = [line.strip() for line in text.split('\n') if line.strip()]
+
+    elif ext == 'json':
+        data = json.loads(content.decode('utf-8'))
+        if isinstance(data, list):
+            movie_titles = [item if isinstance(item, str) else str(item) for item in data]
+        elif isinstance(data, dict):
+            # Try to extract titles from common keys
+            for key in ['movies', 'titles', 'items']:
+                if key in data and isinstance(data[key], list):
+                    movie_titles = [item if isinstance(item, str) else str(item) for item in data[key]]
+                    break
+
+    else:
+        raise ValueError(f"Unsupported file type: '{ext}'")
+
+    return movie_titles
+
+def validate_movie_titles(movie_titles: List[str]) -> tuple:
+    """Validate and clean movie titles"""
+    valid_titles = []
+    invalid_titles = []
+
+    for title in movie_titles:
+        cleaned_title = title.strip()
+        if cleaned_title:
+            valid_titles.append(cleaned_title)
+        else:
+            invalid_titles.append(title)
+
+    return valid_titles, invalid_titles